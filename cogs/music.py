@@ -3,32 +3,55 @@ from discord import app_commands
 from discord.ext import commands
 from core.audio_loader import YTDLSource
 import asyncio
+import collections
+import itertools
+import time
 import typing
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Strong references to fire-and-forget tasks so they aren't garbage-collected mid-flight
+_bg_tasks: set[asyncio.Task] = set()
+
+
+def spawn_background(coro: typing.Coroutine) -> asyncio.Task:
+    """Schedules a coroutine as a task and keeps it alive until it finishes."""
+    task = asyncio.create_task(coro)
+    _bg_tasks.add(task)
+    task.add_done_callback(_bg_tasks.discard)
+    return task
+
 
 # ---------------------------------------------------------------------------
 # Guild State — one per server
 # ---------------------------------------------------------------------------
 class GuildState:
-    """Holds per-guild playback state: queue, current track, and timers."""
+    """Holds per-guild playback state: queue, current track, and idle tracking."""
+
+    __slots__ = ("queue", "current_track", "now_playing_message", "idle_since", "voice_client")
 
     def __init__(self) -> None:
-        self.queue: asyncio.Queue[YTDLSource] = asyncio.Queue()
+        self.queue: collections.deque[YTDLSource] = collections.deque()
         self.current_track: typing.Optional[YTDLSource] = None
         self.now_playing_message: typing.Optional[discord.Message] = None
-        self.disconnect_timer: typing.Optional[asyncio.Task] = None
+        # Monotonic timestamp of when the queue ran dry, or None while playing
+        self.idle_since: typing.Optional[float] = None
+        self.voice_client: typing.Optional[discord.VoiceClient] = None
+
+    def peek_upcoming(self, n: int) -> list[YTDLSource]:
+        """Return up to the next `n` queued tracks without copying the whole queue."""
+        return list(itertools.islice(self.queue, n))
 
     def clear(self) -> None:
-        """Reset the queue and cancel any pending timers."""
-        self.queue = asyncio.Queue()
+        """Reset the queue and idle tracking."""
+        # Queued sources already spawned ffmpeg — kill those processes now rather than at GC
+        for source in self.queue:
+            source.cleanup()
+        self.queue.clear()
         self.current_track = None
         self.now_playing_message = None
-        if self.disconnect_timer and not self.disconnect_timer.done():
-            self.disconnect_timer.cancel()
-            self.disconnect_timer = None
+        self.idle_since = None
 
 
 # ---------------------------------------------------------------------------
@@ -79,26 +102,40 @@ class MusicControlView(discord.ui.View):
 class MusicCog(commands.Cog):
     """Slash-command based music player."""
 
+    IDLE_TIMEOUT: float = 300
+    SWEEP_INTERVAL: float = 60
+
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
-        self.guild_states: typing.Dict[int, GuildState] = {}
+        self.guild_states: collections.defaultdict[int, GuildState] = collections.defaultdict(GuildState)
+        # One shared timer sweeps every guild for inactivity
+        self._sweeper: typing.Optional[asyncio.TimerHandle] = None
+
+    async def cog_load(self) -> None:
+        self._schedule_sweep()
+
+    async def cog_unload(self) -> None:
+        if self._sweeper:
+            self._sweeper.cancel()
+            self._sweeper = None
 
     # -- helpers -------------------------------------------------------------
 
     def get_guild_state(self, guild_id: int) -> GuildState:
-        if guild_id not in self.guild_states:
-            self.guild_states[guild_id] = GuildState()
         return self.guild_states[guild_id]
 
     async def full_stop(self, guild: discord.Guild, state: GuildState) -> None:
         """Stop playback, clear queue, disconnect, and garbage-collect state."""
+        # Empty the queue first so the after_playing callback fired by stop() finds nothing to play
         state.clear()
         vc = guild.voice_client
-        if vc:
-            vc.stop()
-            await vc.disconnect(force=True)
-        if guild.id in self.guild_states:
-            del self.guild_states[guild.id]
+        try:
+            if vc:
+                vc.stop()
+                # Let the disconnect finish even if our caller is cancelled mid-way
+                await asyncio.shield(vc.disconnect(force=True))
+        finally:
+            self.guild_states.pop(guild.id, None)
 
     async def ensure_voice(self, interaction: discord.Interaction) -> typing.Optional[discord.VoiceClient]:
         """
@@ -134,36 +171,33 @@ class MusicCog(commands.Cog):
     # -- playback engine -----------------------------------------------------
 
     async def play_next(self, guild: discord.Guild, text_channel: discord.abc.Messageable) -> None:
-        """Plays the next track from the queue, or starts the inactivity timer."""
-        state = self.get_guild_state(guild.id)
+        """Plays the next track from the queue, or marks the guild as idle."""
         vc: typing.Optional[discord.VoiceClient] = guild.voice_client
 
+        # Check before touching state so a late callback doesn't resurrect it after full_stop
         if not vc or not vc.is_connected():
             return
 
-        if state.queue.empty():
+        state = self.get_guild_state(guild.id)
+
+        if not state.queue:
             state.current_track = None
-            # Start the 5-minute inactivity timer
-            if state.disconnect_timer and not state.disconnect_timer.done():
-                state.disconnect_timer.cancel()
-            state.disconnect_timer = asyncio.create_task(
-                self.disconnect_after_timeout(guild.id)
-            )
+            # The sweeper disconnects after IDLE_TIMEOUT of inactivity
+            state.idle_since = time.monotonic()
             return
 
-        # Cancel any pending disconnect
-        if state.disconnect_timer and not state.disconnect_timer.done():
-            state.disconnect_timer.cancel()
-            state.disconnect_timer = None
+        state.idle_since = None
 
-        source = await state.queue.get()
+        # Queued sources were fully resolved (and ffmpeg spawned) by /play,
+        # so the next track is ready to start without another yt-dlp round-trip
+        source = state.queue.popleft()
         state.current_track = source
 
         def after_playing(error: typing.Optional[Exception]) -> None:
             if error:
                 logger.error(f"Playback error in guild {guild.id}: {error}")
-            coro = self.play_next(guild, text_channel)
-            asyncio.run_coroutine_threadsafe(coro, self.bot.loop)
+            # Called from the audio player thread — hand off to the loop without a Future
+            self.bot.loop.call_soon_threadsafe(spawn_background, self.play_next(guild, text_channel))
 
         vc.play(source, after=after_playing)
 
@@ -179,15 +213,32 @@ class MusicCog(commands.Cog):
         if source.requester:
             embed.add_field(name="Requested by", value=source.requester.mention, inline=True)
 
+        # Send in the background so play_next returns as soon as playback starts
         view = MusicControlView(self, guild.id)
+        spawn_background(self.send_now_playing(text_channel, embed, view))
+
+    async def send_now_playing(
+        self, text_channel: discord.abc.Messageable, embed: discord.Embed, view: discord.ui.View,
+    ) -> None:
         try:
             await text_channel.send(embed=embed, view=view)
         except Exception as e:
             logger.error(f"Failed to send now-playing embed: {e}")
 
-    async def disconnect_after_timeout(self, guild_id: int) -> None:
-        """Wait 5 minutes then auto-disconnect if nothing is playing."""
-        await asyncio.sleep(300)
+    def _schedule_sweep(self) -> None:
+        self._sweeper = asyncio.get_running_loop().call_later(self.SWEEP_INTERVAL, self._sweep)
+
+    def _sweep(self) -> None:
+        """Disconnects every guild that has been idle longer than IDLE_TIMEOUT."""
+        now = time.monotonic()
+        for guild_id, state in self.guild_states.items():
+            if state.idle_since is not None and now - state.idle_since > self.IDLE_TIMEOUT:
+                state.idle_since = None  # fire once per idle period
+                spawn_background(self.disconnect_idle(guild_id))
+        self._schedule_sweep()
+
+    async def disconnect_idle(self, guild_id: int) -> None:
+        """Auto-disconnect from an idle guild if nothing is playing."""
         guild = self.bot.get_guild(guild_id)
         if guild is None:
             return
@@ -197,7 +248,7 @@ class MusicCog(commands.Cog):
         vc = guild.voice_client
         if vc and vc.is_connected() and not vc.is_playing():
             await self.full_stop(guild, state)
-            logger.info(f"Auto-disconnected from guild {guild_id} after 5min inactivity.")
+            logger.info(f"Auto-disconnected from guild {guild_id} after {self.IDLE_TIMEOUT:g}s inactivity.")
 
     # -- slash commands ------------------------------------------------------
 
@@ -223,7 +274,7 @@ class MusicCog(commands.Cog):
             await interaction.followup.send(f"❌ Could not load track: {e}")
             return
 
-        await state.queue.put(source)
+        state.queue.append(source)
 
         if not vc.is_playing() and not vc.is_paused():
             await self.play_next(interaction.guild, interaction.channel)
@@ -231,7 +282,7 @@ class MusicCog(commands.Cog):
                 f"▶️ Now playing: **{source.title}**"
             )
         else:
-            pos = state.queue.qsize()
+            pos = len(state.queue)
             await interaction.followup.send(
                 f"📥 Added to queue (#{pos + 1}): **{source.title}**"
             )
@@ -269,14 +320,16 @@ class MusicCog(commands.Cog):
                 f"— {state.current_track.duration_formatted}"
             )
 
-        # Show upcoming (peek into internal deque — read-only, safe)
-        upcoming = list(state.queue._queue)  # type: ignore[attr-defined]
+        # Show upcoming (first 10 only, without copying the whole queue)
+        upcoming = len(state.queue)
         if upcoming:
             lines.append("\n**Up next:**")
-            for i, src in enumerate(upcoming[:10], 1):
-                lines.append(f"`{i}.` [{src.title}]({src.url}) — {src.duration_formatted}")
-            if len(upcoming) > 10:
-                lines.append(f"… and **{len(upcoming) - 10}** more.")
+            lines.extend(
+                f"`{i}.` [{src.title}]({src.url}) — {src.duration_formatted}"
+                for i, src in enumerate(state.peek_upcoming(10), 1)
+            )
+            if upcoming > 10:
+                lines.append(f"… and **{upcoming - 10}** more.")
         elif not state.current_track:
             await interaction.response.send_message("The queue is empty.")
             return
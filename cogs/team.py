@@ -1,6 +1,7 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
+import asyncio
 import random
 import typing
 import logging
@@ -26,9 +27,8 @@ def build_teams_embed(team1: list[discord.Member], team2: list[discord.Member])
 
 def split_into_teams(members: list[discord.Member]) -> tuple[list[discord.Member], list[discord.Member]]:
     """Shuffles a list of members and splits them into two teams."""
-    shuffled = members.copy()
-    random.shuffle(shuffled)
-    mid = len(shuffled) // 2
+    shuffled = random.sample(members, len(members))
+    mid = len(shuffled) >> 1
     return shuffled[:mid], shuffled[mid:]
 
 
@@ -67,17 +67,35 @@ class SortearView(discord.ui.View):
 
         # Collect users who reacted (excluding bots)
         users: list[discord.Member] = []
+        to_fetch: list[int] = []
         async for user in target_reaction.users():
             if user.bot:
                 continue
             if isinstance(user, discord.Member):
                 users.append(user)
             elif interaction.guild:
-                try:
-                    member = interaction.guild.get_member(user.id) or await interaction.guild.fetch_member(user.id)
+                member = interaction.guild.get_member(user.id)
+                if member:
                     users.append(member)
-                except discord.NotFound:
-                    pass
+                else:
+                    to_fetch.append(user.id)
+
+        # Fetch uncached members concurrently, capped to stay clear of rate limits
+        if to_fetch:
+            guild = interaction.guild
+            semaphore = asyncio.Semaphore(10)
+
+            async def fetch(user_id: int) -> discord.Member:
+                async with semaphore:
+                    return await guild.fetch_member(user_id)
+
+            results = await asyncio.gather(*(fetch(uid) for uid in to_fetch), return_exceptions=True)
+            for result in results:
+                if isinstance(result, discord.NotFound):
+                    continue
+                if isinstance(result, BaseException):
+                    raise result
+                users.append(result)
 
         if len(users) < 2:
             await interaction.response.send_message(
@@ -1,10 +1,16 @@
 import discord
 import yt_dlp
 import asyncio
+import collections
+import concurrent.futures
 import functools
+import multiprocessing
+import re
+import time
 import typing
 import os
 import logging
+import urllib.parse
 
 logger = logging.getLogger(__name__)
 
@@ -12,11 +18,21 @@ logger = logging.getLogger(__name__)
 yt_dlp.utils.bug_reports_message = lambda *args, **kwargs: ''
 
 
-class YTDLSource(discord.PCMVolumeTransformer):
-    """Audio source using yt-dlp for extraction and FFmpeg for streaming."""
+class YTDLSource(discord.FFmpegOpusAudio):
+    """Audio source using yt-dlp for extraction and FFmpeg for streaming.
+
+    Emits Opus packets directly; Opus streams are remuxed without re-encoding.
+    """
+
+    # discord.py's audio sources keep a __dict__, so this only fixes our own fields
+    __slots__ = (
+        "data", "title", "url", "stream_url", "duration", "thumbnail", "requester",
+        "_duration_formatted",
+    )
 
     YTDL_OPTIONS: dict = {
-        'format': 'bestaudio/best',
+        # Prefer Opus so FFmpeg can pass the stream through untouched
+        'format': 'bestaudio[acodec=opus]/bestaudio/best',
         'outtmpl': '%(extractor)s-%(id)s-%(title)s.%(ext)s',
         'restrictfilenames': True,
         'noplaylist': True,
@@ -34,15 +50,30 @@ class YTDLSource(discord.PCMVolumeTransformer):
     if os.path.exists('cookies.txt'):
         YTDL_OPTIONS['cookiefile'] = 'cookies.txt'
         logger.info(f"Cookies utilizados")
+    # Input-side flags (probing/buffering) must precede -i, so they live in before_options
     FFMPEG_OPTIONS: dict = {
-        'before_options': '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5',
-        'options': '-vn',
+        'before_options': (
+            '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5 '
+            '-reconnect_on_network_error 1 -reconnect_on_http_error 5xx '
+            '-thread_queue_size 512 '
+            '-probesize 32 -analyzeduration 0 -fflags nobuffer -flags low_delay'
+        ),
+        'options': '-vn -bufsize 1024k',
     }
 
-    ytdl = yt_dlp.YoutubeDL(YTDL_OPTIONS)
+    URL_PATTERN = re.compile(r'https?://')
+
+    # Processed metadata cache keyed by video id. Stream URLs expire after ~6h,
+    # so entries are dropped well before that.
+    CACHE_TTL: float = 5 * 60 * 60
+    CACHE_MAX_SIZE: int = 256
+    _info_cache: 'collections.OrderedDict[str, tuple[float, dict]]' = collections.OrderedDict()
 
-    def __init__(self, source: discord.FFmpegPCMAudio, *, data: dict, volume: float = 0.5) -> None:
-        super().__init__(source, volume)
+    def __init__(self, stream_url: str, *, data: dict) -> None:
+        # FFmpegOpusAudio maps codec 'opus' to '-c:a copy'; anything else is encoded with libopus.
+        # No volume filter is applied on either path, so every track plays at source level
+        # and listeners adjust volume client-side in Discord.
+        super().__init__(stream_url, codec=data.get('acodec'), **self.FFMPEG_OPTIONS)
         self.data: dict = data
         self.title: typing.Optional[str] = data.get('title')
         self.url: typing.Optional[str] = data.get('webpage_url') or data.get('url')
@@ -50,18 +81,60 @@ class YTDLSource(discord.PCMVolumeTransformer):
         self.duration: typing.Optional[int] = data.get('duration')
         self.thumbnail: typing.Optional[str] = data.get('thumbnail')
         self.requester: typing.Optional[discord.User] = data.get('requester')
+        self._duration_formatted: str = self._format_duration(self.duration)
 
     @property
     def duration_formatted(self) -> str:
-        """Returns duration as MM:SS string."""
-        if self.duration is None:
+        """Returns duration as MM:SS string (computed once at construction)."""
+        return self._duration_formatted
+
+    @staticmethod
+    def _format_duration(duration: typing.Optional[float]) -> str:
+        if duration is None:
             return "N/A"
-        minutes, seconds = divmod(self.duration, 60)
+        # Some extractors (e.g. SoundCloud) report fractional seconds
+        minutes, seconds = divmod(int(duration), 60)
         hours, minutes = divmod(minutes, 60)
         if hours > 0:
             return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
         return f"{minutes:02d}:{seconds:02d}"
 
+    @staticmethod
+    def _cache_key(url: str) -> str:
+        """Returns the video id for YouTube URLs, or the URL itself otherwise."""
+        parsed = urllib.parse.urlparse(url)
+        host = parsed.netloc.lower().removeprefix('www.').removeprefix('m.')
+        if host == 'youtu.be':
+            return parsed.path.lstrip('/') or url
+        if host in ('youtube.com', 'music.youtube.com'):
+            video_id = urllib.parse.parse_qs(parsed.query).get('v')
+            if video_id:
+                return video_id[0]
+            if parsed.path.startswith('/shorts/'):
+                return parsed.path.split('/')[2] or url
+        return url
+
+    @classmethod
+    def _cache_get(cls, url: str) -> typing.Optional[dict]:
+        key = cls._cache_key(url)
+        entry = cls._info_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, data = entry
+        if expires_at < time.monotonic():
+            del cls._info_cache[key]
+            return None
+        cls._info_cache.move_to_end(key)
+        return data
+
+    @classmethod
+    def _cache_put(cls, url: str, data: dict) -> None:
+        key = cls._cache_key(url)
+        cls._info_cache[key] = (time.monotonic() + cls.CACHE_TTL, data)
+        cls._info_cache.move_to_end(key)
+        while len(cls._info_cache) > cls.CACHE_MAX_SIZE:
+            cls._info_cache.popitem(last=False)
+
     @classmethod
     async def create_source(
         cls,
@@ -72,46 +145,39 @@ class YTDLSource(discord.PCMVolumeTransformer):
     ) -> 'YTDLSource':
         """Creates a YTDLSource from a search query or URL.
         
-        Uses run_in_executor to avoid blocking the event loop.
+        Extraction runs in a worker process to keep it off the event loop and the GIL.
         Does NOT download the file — streams directly via FFmpeg.
+        Single-video URLs skip the search step, and processed metadata is cached.
         """
         loop = loop or asyncio.get_event_loop()
 
-        # Step 1: Search / extract metadata (no processing yet)
-        partial_extract = functools.partial(
-            cls.ytdl.extract_info, search, download=False, process=False
-        )
-        data = await loop.run_in_executor(None, partial_extract)
-
-        if data is None:
-            raise ValueError(f"Couldn't find anything matching `{search}`")
-
-        # If it's a playlist/search result, take the first entry
-        if 'entries' in data:
-            entries = list(data['entries'])
-            if not entries:
-                raise ValueError(f"Couldn't find anything matching `{search}`")
-            process_info = entries[0]
+        # Single YouTube videos go straight to full extraction; playlists and
+        # other URLs keep the flat first pass so only entries[0] gets resolved
+        if cls.URL_PATTERN.match(search) and cls._cache_key(search) != search:
+            webpage_url = search
         else:
-            process_info = data
+            # Step 1: Search / extract metadata (no processing yet)
+            process_info = await _run_extract(loop, search, False)
 
-        # Step 2: Get the actual stream URL
-        webpage_url = process_info.get('url') or process_info.get('webpage_url')
-        if not webpage_url:
-            raise ValueError(f"Couldn't extract a valid URL for `{search}`")
+            if process_info is None:
+                raise ValueError(f"Couldn't find anything matching `{search}`")
 
-        partial_process = functools.partial(
-            cls.ytdl.extract_info, webpage_url, download=False
-        )
-        processed_data = await loop.run_in_executor(None, partial_process)
+            webpage_url = process_info.get('url') or process_info.get('webpage_url')
+            if not webpage_url:
+                raise ValueError(f"Couldn't extract a valid URL for `{search}`")
 
+        # Step 2: Get the actual stream URL
+        processed_data = cls._cache_get(webpage_url)
         if processed_data is None:
-            raise ValueError(f"Couldn't process audio for `{search}`")
+            processed_data = await _run_extract(loop, webpage_url, True)
+
+            if processed_data is None:
+                raise ValueError(f"Couldn't process audio for `{search}`")
 
-        if 'entries' in processed_data:
-            processed_data = processed_data['entries'][0]
+            cls._cache_put(webpage_url, processed_data)
 
-        # Add requester info to data
+        # Add requester info to a per-source copy (the cached dict is shared)
+        processed_data = dict(processed_data)
         processed_data['requester'] = requester
 
         stream_url = processed_data.get('url')
@@ -120,7 +186,80 @@ class YTDLSource(discord.PCMVolumeTransformer):
 
         logger.info(f"Created source: {processed_data.get('title', 'Unknown')}")
 
-        return cls(
-            discord.FFmpegPCMAudio(stream_url, **cls.FFMPEG_OPTIONS),
-            data=processed_data,
+        # Spawning ffmpeg (fork/exec + pipes) can take tens of ms — keep it off the loop
+        return await loop.run_in_executor(
+            None, functools.partial(cls, stream_url, data=processed_data)
         )
+
+
+# ---------------------------------------------------------------------------
+# Extraction worker pool — each process keeps its own YoutubeDL instance
+# ---------------------------------------------------------------------------
+_worker_ytdl: typing.Optional[yt_dlp.YoutubeDL] = None
+
+# The only info fields YTDLSource reads. Returning just these keeps pickles and
+# cache entries small (full info dicts carry formats, captions, etc.).
+_INFO_KEYS = ('url', 'webpage_url', 'title', 'duration', 'thumbnail', 'acodec')
+
+
+def _init_worker() -> None:
+    global _worker_ytdl
+    _worker_ytdl = yt_dlp.YoutubeDL(YTDLSource.YTDL_OPTIONS)
+
+
+def _extract(url: str, process: bool) -> typing.Optional[dict]:
+    """Runs extract_info in a worker and returns the _INFO_KEYS subset of the info dict.
+
+    Playlist/search results are reduced to their first entry, or None if empty.
+    """
+    # yt-dlp errors carry tracebacks/loggers that can't be pickled back to the parent.
+    # Entries are generated lazily, so consuming them can raise too.
+    try:
+        data = _worker_ytdl.extract_info(url, download=False, process=process)
+        if data is None:
+            return None
+        if 'entries' in data:
+            data = next(iter(data['entries']), None)
+            if data is None:
+                return None
+        return {key: data.get(key) for key in _INFO_KEYS}
+    except yt_dlp.utils.YoutubeDLError as e:
+        raise ValueError(str(e)) from None
+
+
+# Each worker holds its own YoutubeDL (and loaded cookies), so keep the pool small
+_EXTRACT_MAX_WORKERS = 4
+
+# Workers start lazily once the bot is running threads — forking then is unsafe.
+# forkserver isn't available on Windows, where spawn is the default anyway.
+_EXTRACT_START_METHOD = (
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+)
+
+
+def _create_extract_pool() -> concurrent.futures.ProcessPoolExecutor:
+    return concurrent.futures.ProcessPoolExecutor(
+        max_workers=_EXTRACT_MAX_WORKERS,
+        mp_context=multiprocessing.get_context(_EXTRACT_START_METHOD),
+        initializer=_init_worker,
+    )
+
+
+_extract_pool = _create_extract_pool()
+
+
+async def _run_extract(
+    loop: asyncio.AbstractEventLoop, url: str, process: bool,
+) -> typing.Optional[dict]:
+    """Runs _extract in the worker pool, rebuilding the pool once if a worker died."""
+    global _extract_pool
+    pool = _extract_pool
+    try:
+        return await loop.run_in_executor(pool, _extract, url, process)
+    except concurrent.futures.process.BrokenProcessPool:
+        logger.warning("Extraction worker pool broke, recreating it.")
+        # Another caller may already have replaced it
+        if _extract_pool is pool:
+            _extract_pool = _create_extract_pool()
+            pool.shutdown(wait=False)
+        return await loop.run_in_executor(_extract_pool, _extract, url, process)
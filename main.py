@@ -2,7 +2,10 @@ import discord
 from discord.ext import commands
 import logging
 import asyncio
+import concurrent.futures
 import os
+import signal
+import threading
 from dotenv import load_dotenv
 
 # Setup Logging
@@ -19,8 +22,24 @@ class MyBot(commands.Bot):
         intents.voice_states = True
         intents.members = True
         super().__init__(command_prefix='!', intents=intents)
+        self._close_task = None
 
     async def setup_hook(self):
+        loop = asyncio.get_running_loop()
+
+        # Cap the default executor (used for spawning ffmpeg) instead of scaling with CPU count
+        loop.set_default_executor(
+            concurrent.futures.ThreadPoolExecutor(max_workers=8, thread_name_prefix="audio")
+        )
+
+        # Graceful shutdown on SIGTERM (docker stop) — only possible from the main thread
+        if threading.current_thread() is threading.main_thread():
+            try:
+                loop.add_signal_handler(signal.SIGTERM, self._on_sigterm)
+            except NotImplementedError:
+                # Windows event loops don't support signal handlers
+                pass
+
         # Load Cogs with error handling
         cogs = ['cogs.music', 'cogs.team']
         for cog in cogs:
@@ -35,6 +54,12 @@ class MyBot(commands.Bot):
         await self.tree.sync()
         logger.info("Commands synced.")
 
+    def _on_sigterm(self):
+        if self._close_task is not None:
+            return
+        logger.info("SIGTERM received, shutting down...")
+        self._close_task = asyncio.create_task(self.close())
+
     async def on_ready(self):
         logger.info(f'Logged in as {self.user} (ID: {self.user.id})')
         logger.info('------')